@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of portfolio analyses
+Owned objects change slowly, so an analysis is reused for the same address
+within the same epoch (and for at most MAX_AGE seconds)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sui_defi_advisor.db")
+
+# Upper bound on how stale a cached analysis may be, epochs last about a day
+MAX_AGE = 15 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    address TEXT,
+    epoch INT,
+    payload BLOB,
+    ts INT,
+    PRIMARY KEY (address, epoch)
+)
+"""
+
+class AnalysisCache:
+    """
+    Best-effort SQLite cache keyed by (address, epoch)
+    Any storage error just disables caching for that call. A connection is
+    opened per operation so the cache can be used from worker threads.
+    """
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age: int = MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with closing(sqlite3.connect(path)) as conn, conn:
+                conn.execute(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  Analysis cache disabled: {e}")
+            self.path = None
+    
+    def get(self, address: str, epoch: int) -> Optional[Dict]:
+        """Return the cached analysis for address in epoch, or None"""
+        if not self.path:
+            return None
+        try:
+            with closing(sqlite3.connect(self.path)) as conn:
+                row = conn.execute(
+                    "SELECT payload FROM analyses WHERE address = ? AND epoch = ? AND ts >= ?",
+                    (address, epoch, int(time.time()) - self.max_age)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError):
+            return None
+    
+    def put(self, address: str, epoch: int, analysis: Dict):
+        """Store an analysis, replacing any older one for the same address"""
+        if not self.path:
+            return
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                conn.execute("DELETE FROM analyses WHERE address = ?", (address,))
+                conn.execute(
+                    "INSERT INTO analyses (address, epoch, payload, ts) VALUES (?, ?, ?, ?)",
+                    (address, epoch, json.dumps(analysis), int(time.time()))
+                )
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
@@ -4,23 +4,74 @@ Simple DeFi Advisor for Sui Blockchain
 No smart contracts required - uses existing blockchain data
 """
 
-from pysui import PysuiConfiguration, SyncGqlClient
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 import pysui.sui.sui_pgql.pgql_query as qn
-import json
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import os
+import time
+
+from analysis_cache import DEFAULT_CACHE_PATH, AnalysisCache
+from sui_graphql import EPOCH_QUERY, ConcurrentGqlClient, create_client, fetch_wallet_data
+from type_classifier import make_keyword_classifier
+
+# Seconds a network-wide query result stays fresh
+GAS_PRICE_TTL = 10
+VALIDATORS_APY_TTL = 60
+EPOCH_TTL = 60
+
+# Coin symbols treated as stablecoins
+_STABLECOIN_SYMBOLS = frozenset({"usdc", "usdt", "dai", "usdy"})
+
+# Report timestamp placeholder, formatted once instead of on every report
+_TS_PLACEHOLDER = '{\n  "generated": "now"\n}'
+
+# Static report sections, formatted once at import time
+_STAKING_HEADER = f"""
+💰 STAKING OPPORTUNITIES:
+{'-'*30}
+"""
+_REPORT_FOOTER = f"""
+{'='*50}
+🤖 Report generated by Sui DeFi Advisor
+📅 Timestamp: {_TS_PLACEHOLDER}
+"""
+
+# Special object keywords in priority order, a None label means "skip"
+_SPECIAL_OBJECTS = (
+    ("suins_registration", "SuiNS Domain"),
+    ("vote", "Voting NFT"),
+    ("upgradecap", "Package Upgrade Cap"),
+    ("coin::coin", None),  # Coin objects are counted separately
+)
+# Labels an owned object by its lowercased type, None for objects that are skipped
+_special_object_label = make_keyword_classifier(_SPECIAL_OBJECTS, "DeFi Position")
 
 class SuiDeFiAdvisor:
     """DeFi advisor that analyzes Sui blockchain data without smart contracts"""
     
-    def __init__(self):
-        """Initialize the advisor with Sui GraphQL client"""
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 client: Optional[ConcurrentGqlClient] = None):
+        """
+        Initialize the advisor with Sui GraphQL client
+        cache_path: SQLite file for cached per-address analyses, None disables it
+        client: existing client to share, one is created when omitted
+        """
+        # Query name -> (timestamp, result) for slow-changing network data
+        self._cache = {}
+        # Epoch fetch started by warm_up(), awaited instead of querying twice
+        self._epoch_future = None
+        # Long-lived workers so their client sessions stay connected between reports
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="advisor")
+        disk_cache = AnalysisCache(cache_path) if cache_path else None
+        # A cache that failed to open is dropped, so no epoch is fetched for it
+        self._disk_cache = disk_cache if disk_cache and disk_cache.path else None
+        
         try:
             # Use the properly configured PysuiConfiguration
-            cfg = PysuiConfiguration(group_name=PysuiConfiguration.SUI_GQL_RPC_GROUP)
-            self.client = SyncGqlClient(pysui_config=cfg, write_schema=False)
+            self.client = client or create_client()
             print("✅ DeFi Advisor initialized successfully on MAINNET")
-            print(f"📡 Connected to: {cfg.url}")
+            print(f"📡 Connected to: {self.client.url()}")
         except Exception as e:
             print(f"❌ Failed to initialize: {e}")
             self.client = None
@@ -36,19 +87,22 @@ class SuiDeFiAdvisor:
         try:
             print(f"🔍 Analyzing portfolio for address: {address}")
             
-            # Get all coin balances
-            balances_result = self.client.execute_query_node(
-                with_node=qn.GetAllCoinBalances(owner=address)
-            )
+            # Holdings rarely change within an epoch, so reuse a recent analysis
+            epoch = self._current_epoch()
+            if epoch is not None:
+                cached = self._disk_cache.get(address, epoch)
+                if cached is not None:
+                    return cached
             
-            # Get all owned objects
-            objects_result = self.client.execute_query_node(
-                with_node=qn.GetObjectsOwnedByAddress(owner=address)
-            )
+            # Get coin balances and owned objects in a single query
+            balances_result, objects_result = fetch_wallet_data(self.client, address)
             
             # Basic portfolio analysis
             analysis = self._analyze_portfolio_data(balances_result, objects_result)
             
+            if epoch is not None and "error" not in analysis:
+                self._disk_cache.put(address, epoch, analysis)
+            
             return analysis
             
         except Exception as e:
@@ -59,29 +113,96 @@ class SuiDeFiAdvisor:
         Find best staking opportunities using existing validators
         NO SMART CONTRACTS NEEDED - uses Sui's built-in staking
         """
+        return self._finish_staking(self._start_staking())
+    
+    def _start_staking(self) -> Optional[Tuple[Future, Future]]:
+        """
+        Submit the staking queries to the pool and return their futures
+        Each is a single round-trip, so an interrupted run waits for at most one.
+        """
         if not self.client:
+            return None
+        
+        print("🎯 Finding staking opportunities...")
+        
+        # Validator APY information, and the current gas price for cost analysis
+        validators_future = self._executor.submit(
+            self._cached_query, "GetValidatorsApy", VALIDATORS_APY_TTL,
+            lambda: self.client.execute_query_node(with_node=qn.GetValidatorsApy())
+        )
+        gas_future = self._executor.submit(
+            self._cached_query, "GetReferenceGasPrice", GAS_PRICE_TTL,
+            lambda: self.client.execute_query_node(with_node=qn.GetReferenceGasPrice())
+        )
+        return validators_future, gas_future
+    
+    def _finish_staking(self, queries: Optional[Tuple[Future, Future]]) -> Dict:
+        """Wait for the queries from _start_staking() and analyze them"""
+        if queries is None:
             return {"error": "Client not initialized"}
         
         try:
-            print("🎯 Finding staking opportunities...")
-            
-            # Get validator APY information
-            validators_result = self.client.execute_query_node(
-                with_node=qn.GetValidatorsApy()
-            )
-            
-            # Get current gas price for cost analysis
-            gas_result = self.client.execute_query_node(
-                with_node=qn.GetReferenceGasPrice()
-            )
-            
-            opportunities = self._analyze_staking_data(validators_result, gas_result)
+            validators_future, gas_future = queries
+            opportunities = self._analyze_staking_data(validators_future.result(), gas_future.result())
             
             return opportunities
             
         except Exception as e:
             return {"error": f"Staking analysis failed: {e}"}
     
+    def _cached_query(self, name: str, ttl: float, fn: Callable):
+        """Return the cached result for name if younger than ttl seconds, else run fn"""
+        now = time.monotonic()
+        cached = self._cache.get(name)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        result = fn()
+        # Only successful results are worth reusing
+        if result.is_ok():
+            self._cache[name] = (now, result)
+        return result
+    
+    def _query_epoch(self):
+        """Run EPOCH_QUERY without the cache"""
+        return self.client.execute_query_string(string=EPOCH_QUERY)
+    
+    def warm_up(self):
+        """
+        Open a pooled connection in the background, e.g. while the user is prompted
+        With the disk cache on, this fetches the epoch the next analysis needs;
+        otherwise a trivial query is sent. Every thread then reuses the connection.
+        """
+        if not self.client:
+            return
+        if self._disk_cache:
+            self._epoch_future = self._executor.submit(
+                self._cached_query, "CurrentEpoch", EPOCH_TTL, self._query_epoch
+            )
+        else:
+            self._executor.submit(self.client.warm_up)
+    
+    def _current_epoch(self) -> Optional[int]:
+        """Current epoch number, or None when the disk cache is off or it is unavailable"""
+        if not self._disk_cache:
+            return None
+        
+        # Let an in-flight warm-up fetch finish and fill the cache. This waits on
+        # a pool task, so it must only run on the calling thread: analyze_portfolio()
+        # is never submitted to the pool, or both workers could end up waiting.
+        future, self._epoch_future = self._epoch_future, None
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                pass
+        
+        result = self._cached_query("CurrentEpoch", EPOCH_TTL, self._query_epoch)
+        try:
+            return int(result.result_data["epoch"]["epochId"])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
     def _analyze_portfolio_data(self, balances_result, objects_result) -> Dict:
         """Analyze portfolio data and provide insights"""
         try:
@@ -90,43 +211,36 @@ class SuiDeFiAdvisor:
             
             # Count different assets - fix the data parsing
             coin_types = []
+            coin_names = []
+            symbols = set()
             total_balance_count = 0
             total_balance_value = 0
             
             # Parse coin balances correctly
-            if hasattr(balances_data, 'data') and balances_data.data:
-                for balance in balances_data.data:
-                    if hasattr(balance, 'coin_type'):
-                        coin_types.append(balance.coin_type)
-                        total_balance_count += 1
-                        # Extract balance value
-                        if hasattr(balance, 'total_balance'):
-                            try:
-                                balance_val = int(balance.total_balance)
-                                total_balance_value += balance_val
-                            except (ValueError, TypeError):
-                                pass
+            balances = getattr(balances_data, 'data', None)
+            if balances:
+                # CoinBalance records always carry both fields, no guards needed
+                items = [(balance.coin_type, balance.total_balance) for balance in balances]
+                coin_types = [ct for ct, _ in items]
+                # Coin types look like 0x...::module::NAME, NAME is the readable symbol
+                coin_names = [ct.rsplit('::', 1)[-1] for ct in coin_types]
+                symbols = {name.lower() for name in coin_names}
+                total_balance_count = len(items)
+                # Balances arrive as ints (u64, so Python ints rather than int64)
+                total_balance_value = sum(tb for _, tb in items)
             
             # Count objects (NFTs, DeFi positions, etc.)
             object_count = 0
-            special_objects = []
-            if hasattr(objects_data, 'data') and objects_data.data:
-                object_count = len(objects_data.data)
-                # Identify special objects
-                for obj in objects_data.data:
-                    if hasattr(obj, 'object_type'):
-                        obj_type = obj.object_type
-                        if 'suins_registration' in obj_type.lower():
-                            special_objects.append("SuiNS Domain")
-                        elif 'vote' in obj_type.lower():
-                            special_objects.append("Voting NFT")
-                        elif 'upgradecap' in obj_type.lower():
-                            special_objects.append("Package Upgrade Cap")
-                        elif 'coin::coin' in obj_type.lower():
-                            # Skip coin objects as they're counted separately
-                            continue
-                        else:
-                            special_objects.append("DeFi Position")
+            # Only a handful of labels exist, so counting keeps this O(1) in wallet size
+            special_counts = Counter()
+            objects = getattr(objects_data, 'data', None)
+            if objects:
+                # Objects are streamed page by page, so count while identifying special objects
+                for obj in objects:
+                    object_count += 1
+                    label = _special_object_label(obj.object_type.lower())
+                    if label:
+                        special_counts[label] += 1
             
             # Generate insights based on actual data
             insights = []
@@ -146,15 +260,16 @@ class SuiDeFiAdvisor:
                 risk_level = "Low"
             
             if object_count > 0:
-                insights.append(f"🎨 You own {object_count} objects including: {', '.join(special_objects[:3])}")
+                top_objects = ', '.join(f"{label} ×{n}" for label, n in special_counts.most_common(3))
+                insights.append(f"🎨 You own {object_count} objects including: {top_objects}")
             
             # Check for SUI tokens specifically
-            has_sui = any('sui::SUI' in ct for ct in coin_types)
+            has_sui = 'sui' in symbols
             if has_sui:
                 insights.append("💰 You have SUI tokens - great for staking!")
             
             # Check for stablecoins
-            has_stablecoins = any('usdc' in ct.lower() or 'usdt' in ct.lower() for ct in coin_types)
+            has_stablecoins = not symbols.isdisjoint(_STABLECOIN_SYMBOLS)
             if has_stablecoins:
                 insights.append("🛡️  You have stablecoins - good for portfolio stability")
             
@@ -164,10 +279,10 @@ class SuiDeFiAdvisor:
                     "unique_coin_types": len(set(coin_types)),
                     "objects_owned": object_count,
                     "risk_level": risk_level,
-                    "special_objects": special_objects
+                    "special_objects": dict(special_counts)
                 },
                 "insights": insights,
-                "coin_types": [ct.split('::')[-1] if '::' in ct else ct for ct in coin_types[:5]],  # Show readable names
+                "coin_types": coin_names[:5],  # Show readable names
                 "recommendations": self._generate_recommendations(total_balance_count, coin_types, has_sui, has_stablecoins)
             }
             
@@ -245,14 +360,23 @@ class SuiDeFiAdvisor:
         
         return recommendations
     
-    def generate_report(self, address: str) -> str:
-        """Generate a comprehensive DeFi report"""
+    def generate_report(self, address: str, analysis: Optional[Dict] = None) -> Tuple[str, Dict]:
+        """
+        Generate a comprehensive DeFi report
+        analysis: an earlier analyze_portfolio(address) result to render instead of
+        analyzing again. Returns (report, analysis) so callers can reuse the data.
+        """
         print("📊 Generating comprehensive DeFi report...")
         
-        portfolio = self.analyze_portfolio(address)
-        staking = self.get_staking_opportunities()
+        # Wallet and staking queries are independent, run them concurrently.
+        # The wallet may take many paged requests, so it is analyzed on this thread
+        # where Ctrl-C can stop it; only the single round-trip staking queries go
+        # to the pool, and no pool task waits on another.
+        staking_queries = self._start_staking()
+        portfolio = self.analyze_portfolio(address) if analysis is None else analysis
+        staking = self._finish_staking(staking_queries)
         
-        report = f"""
+        parts = [f"""
 🏦 SUI DEFI ADVISOR REPORT
 {'='*50}
 
@@ -260,50 +384,43 @@ class SuiDeFiAdvisor:
 
 📊 PORTFOLIO ANALYSIS:
 {'-'*30}
-"""
+"""]
         
         if "error" not in portfolio:
             summary = portfolio.get("portfolio_summary", {})
-            report += f"""
+            parts.append(f"""
 • Total Coin Types: {summary.get('total_coin_types', 0)}
 • Unique Assets: {summary.get('unique_coin_types', 0)}
 • Objects Owned: {summary.get('objects_owned', 0)}
 • Risk Level: {summary.get('risk_level', 'Unknown')}
 
 💡 KEY INSIGHTS:
-"""
+""")
             for insight in portfolio.get("insights", []):
-                report += f"  {insight}\n"
+                parts.append(f"  {insight}\n")
             
-            report += f"\n🎯 RECOMMENDATIONS:\n"
+            parts.append("\n🎯 RECOMMENDATIONS:\n")
             for rec in portfolio.get("recommendations", []):
-                report += f"  {rec}\n"
+                parts.append(f"  {rec}\n")
         else:
-            report += f"  ❌ {portfolio['error']}\n"
+            parts.append(f"  ❌ {portfolio['error']}\n")
         
-        report += f"""
-💰 STAKING OPPORTUNITIES:
-{'-'*30}
-"""
+        parts.append(_STAKING_HEADER)
         
         if "error" not in staking:
             for rec in staking.get("recommendations", []):
-                report += f"  {rec}\n"
+                parts.append(f"  {rec}\n")
             
             gas_info = staking.get("gas_cost_analysis", {})
             if gas_info:
-                report += f"\n⛽ Gas Price: {gas_info.get('current_gas_price', 'Unknown')}\n"
-                report += f"  {gas_info.get('recommendation', '')}\n"
+                parts.append(f"\n⛽ Gas Price: {gas_info.get('current_gas_price', 'Unknown')}\n")
+                parts.append(f"  {gas_info.get('recommendation', '')}\n")
         else:
-            report += f"  ❌ {staking['error']}\n"
+            parts.append(f"  ❌ {staking['error']}\n")
         
-        report += f"""
-{'='*50}
-🤖 Report generated by Sui DeFi Advisor
-📅 Timestamp: {json.dumps({"generated": "now"}, indent=2)}
-"""
+        parts.append(_REPORT_FOOTER)
         
-        return report
+        return "".join(parts), portfolio
 
 # End of SuiDeFiAdvisor class
 # Use main.py to run the advisor 
\ No newline at end of file
@@ -3,122 +3,273 @@
 Main entry point for the Sui DeFi Advisor
 """
 
-from defi_advisor import SuiDeFiAdvisor
-from defi_platforms import SuiDeFiPlatforms
+import argparse
+import re
 import sys
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
 
-def main():
-    """Main function to run the DeFi advisor"""
-    print("🚀 Welcome to Sui DeFi Advisor!")
-    print("="*50)
+from analysis_cache import DEFAULT_CACHE_PATH
+
+try:
+    # Optional: much faster encoder that produces bytes for stdout directly
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _print_json(data):
+    """Print data as indented JSON, using orjson when it is installed"""
+    if orjson is None:
+        import json
+        # Encoded chunks go straight to stdout instead of building one big string
+        json.dump(data, sys.stdout, indent=2, default=str)
+        sys.stdout.write("\n")
+        return
+    # Text written so far must reach stdout before the raw bytes do
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS) + b"\n"
+    )
+    sys.stdout.buffer.flush()
+
+
+def _in_background(fn, *args) -> Future:
+    """
+    Run fn(*args) on a daemon thread and return a future for its result
+    Unlike pool workers, a daemon thread doesn't hold up exit after Ctrl-C.
+    """
+    future = Future()
     
-    # Initialize both the advisor and platforms detector
-    advisor = SuiDeFiAdvisor()
-    platforms_detector = SuiDeFiPlatforms()
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
     
-    if not advisor.client or not platforms_detector.client:
-        print("❌ Failed to initialize. Please check your connection.")
-        return
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _load_sui_modules():
+    """
+    Import the advisor modules, deferred until they are needed
+    They pull in pysui, gql and httpx, which take a noticeable time to import.
+    """
+    from defi_advisor import SuiDeFiAdvisor
+    from defi_platforms import SuiDeFiPlatforms
+    from sui_graphql import create_client
+    return SuiDeFiAdvisor, SuiDeFiPlatforms, create_client
+
+# Sui addresses are 0x followed by 64 hex characters
+_ADDR_RE = re.compile(r"0x[0-9a-fA-F]{64}")
+
+SEP = "=" * 50
+
+# Static screens, each written with a single print
+_WELCOME = f"🚀 Welcome to Sui DeFi Advisor!\n{SEP}"
+_ADDRESS_PROMPT = """📍 Please enter a Sui wallet address to analyze:
+   (Example: 0x1a2b3c4d5e6f7890abcdef1234567890abcdef1234567890abcdef1234567890)"""
+_FORMAT_HINT = "   Expected: 0x followed by 64 hex characters"
+_MENU = """
+📊 Choose analysis type:
+1. 📈 Portfolio Analysis (Default)
+2. 🏗️  DeFi Platforms Detection
+3. 🔍 Complete Analysis (Both)"""
+
+
+def _section(title: str) -> str:
+    """Banner printed above a report or data dump"""
+    return f"\n{SEP}\n{title}\n{SEP}"
+
+
+# --mode values and the menu choices they stand for
+_MODES = {"portfolio": "1", "platforms": "2", "both": "3"}
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command line options
+    With both --address and --mode the analysis runs without any prompts.
+    """
+    parser = argparse.ArgumentParser(description="Analyze a Sui wallet for DeFi opportunities")
+    parser.add_argument("address", nargs="?", help="wallet address (same as --address)")
+    parser.add_argument("--address", dest="address_opt", metavar="ADDRESS", help="wallet address to analyze")
+    parser.add_argument("--mode", choices=_MODES, help="analysis to run instead of asking")
+    parser.add_argument("--json", action="store_true", help="also print the detailed JSON data")
+    parser.add_argument("--no-cache", action="store_true", help="analyze the wallet again instead of reusing a recent result")
+    args = parser.parse_args(argv)
+    args.address = args.address_opt or args.address
+    return args
+
+
+def _prompt_address() -> Optional[str]:
+    """
+    Ask for a wallet address, returning None if the user gives up
+    Addresses that fail _ADDR_RE are only used after the user confirms them.
+    """
+    print(_ADDRESS_PROMPT)
+    
+    try:
+        address = input("🔗 Wallet Address: ").strip()
+        
+        if not address:
+            print("❌ No address provided. Exiting.")
+            return None
+        
+        if not _ADDR_RE.fullmatch(address):
+            print(f"⚠️  Warning: Address format may be incorrect\n{_FORMAT_HINT}")
+            
+            confirm = input("Continue anyway? (y/N): ").strip().lower()
+            if confirm != 'y':
+                print("👋 Goodbye!")
+                return None
+        
+        return address
+    
+    except KeyboardInterrupt:
+        print("\n👋 Goodbye!")
+        return None
+    except Exception as e:
+        print(f"❌ Error getting address: {e}")
+        return None
+
+
+def main() -> int:
+    """
+    Main function to run the DeFi advisor
+    Returns the exit status: 2 for a bad address argument, 1 when setup or the analysis fails.
+    """
+    args = _parse_args()
+    print(_WELCOME)
+    
+    modules_future = None
     
     # Get address from command line or prompt user
-    if len(sys.argv) > 1:
-        address = sys.argv[1]
+    if args.address:
+        address = args.address
+        if not _ADDR_RE.fullmatch(address):
+            print(f"❌ Invalid address: {address}\n{_FORMAT_HINT}")
+            return 2
         print(f"📍 Using provided address: {address}")
     else:
-        # Always prompt user for address
-        print("📍 Please enter a Sui wallet address to analyze:")
-        print("   (Example: 0x1a2b3c4d5e6f7890abcdef1234567890abcdef1234567890abcdef1234567890)")
+        # Import the Sui modules in the background while the address is typed
+        modules_future = _in_background(_load_sui_modules)
         
-        try:
-            address = input("🔗 Wallet Address: ").strip()
-            
-            if not address:
-                print("❌ No address provided. Exiting.")
-                return
-            
-            # Basic validation
-            if not address.startswith('0x') or len(address) != 66:
-                print("⚠️  Warning: Address format may be incorrect")
-                print("   Expected: 0x followed by 64 hex characters")
-                
-                confirm = input("Continue anyway? (y/N): ").strip().lower()
-                if confirm != 'y':
-                    print("👋 Goodbye!")
-                    return
-        
-        except KeyboardInterrupt:
-            print("\n👋 Goodbye!")
-            return
-        except Exception as e:
-            print(f"❌ Error getting address: {e}")
-            return
+        # Always prompt user for address
+        address = _prompt_address()
+        if address is None:
+            return 0
+    
+    if modules_future is None:
+        SuiDeFiAdvisor, SuiDeFiPlatforms, create_client = _load_sui_modules()
+    else:
+        SuiDeFiAdvisor, SuiDeFiPlatforms, create_client = modules_future.result()
     
-    print(f"\n🎯 Analyzing wallet: {address}")
-    print("="*50)
+    # Initialize both the advisor and platforms detector on one shared client,
+    # so the schema is loaded once and connections are reused by both
+    try:
+        client = create_client()
+    except Exception as e:
+        print(f"❌ Failed to initialize: {e}")
+        return 1
+    cache_path = None if args.no_cache else DEFAULT_CACHE_PATH
+    advisor = SuiDeFiAdvisor(cache_path=cache_path, client=client)
+    platforms_detector = SuiDeFiPlatforms(client=client)
+    
+    if not advisor.client or not platforms_detector.client:
+        print("❌ Failed to initialize. Please check your connection.")
+        return 1
+    
+    print(f"\n🎯 Analyzing wallet: {address}\n{SEP}")
     
     try:
-        # Ask user what type of analysis they want
-        print("\n📊 Choose analysis type:")
-        print("1. 📈 Portfolio Analysis (Default)")
-        print("2. 🏗️  DeFi Platforms Detection") 
-        print("3. 🔍 Complete Analysis (Both)")
+        if args.mode:
+            choice = _MODES[args.mode]
+        else:
+            # Connect and fetch the epoch while the user picks an analysis type
+            advisor.warm_up()
+            
+            # Ask user what type of analysis they want
+            print(_MENU)
+            
+            try:
+                choice = input("\nEnter choice (1-3) or press Enter for default: ").strip()
+                if not choice:
+                    choice = "1"
+            except KeyboardInterrupt:
+                print("\n👋 Goodbye!")
+                return 0
         
-        try:
-            choice = input("\nEnter choice (1-3) or press Enter for default: ").strip()
-            if not choice:
-                choice = "1"
-        except KeyboardInterrupt:
-            print("\n👋 Goodbye!")
-            return
+        # Portfolio analysis behind the report, reused for the detailed output
+        analysis = None
         
         if choice == "1":
             # Portfolio analysis only
-            print("\n" + "="*50)
-            report = advisor.generate_report(address)
+            print("\n" + SEP)
+            report, analysis = advisor.generate_report(address)
             print(report)
             
         elif choice == "2":
             # DeFi platforms detection only
-            print("\n" + "="*50)
+            print("\n" + SEP)
             platforms_report = platforms_detector.generate_platforms_report(address)
             print(platforms_report)
             
         elif choice == "3":
-            # Complete analysis
-            print("\n" + "="*50)
-            print("📈 PORTFOLIO ANALYSIS:")
-            print("="*50)
-            report = advisor.generate_report(address)
-            print(report)
+            # Complete analysis, both reports are independent so they run concurrently.
+            # The portfolio report may be served from the analysis cache without
+            # fetching the wallet, so the platforms report fetches its own.
+            # Plain threads rather than asyncio: the pysui clients are synchronous,
+            # and asyncio.run() would take over SIGINT so Ctrl-C at input() stops working.
+            # The portfolio report runs here so Ctrl-C still stops it, and the
+            # platforms report on a daemon thread that won't hold up exit.
+            platforms_future = _in_background(platforms_detector.generate_platforms_report, address)
             
-            print("\n" + "="*50)
-            print("🏗️ DEFI PLATFORMS ANALYSIS:")
-            print("="*50)
-            platforms_report = platforms_detector.generate_platforms_report(address)
-            print(platforms_report)
+            # A failure in one report still lets the other one print
+            try:
+                report, analysis = advisor.generate_report(address)
+            except Exception as e:
+                report = f"❌ Portfolio analysis failed: {e}"
+            try:
+                platforms_report = platforms_future.result()
+            except Exception as e:
+                platforms_report = f"❌ Platforms analysis failed: {e}"
+            
+            # Both sections go out in one write
+            print(
+                f"{_section('📈 PORTFOLIO ANALYSIS:')}\n{report}\n"
+                f"{_section('🏗️ DEFI PLATFORMS ANALYSIS:')}\n{platforms_report}"
+            )
             
         else:
             print("❌ Invalid choice. Running default portfolio analysis.")
-            report = advisor.generate_report(address)
+            report, analysis = advisor.generate_report(address)
             print(report)
         
-        # Ask if user wants detailed analysis
+        # Ask if user wants detailed analysis, unless the options already say
         try:
-            detailed = input("\n🔬 Want detailed JSON analysis? (y/N): ").strip().lower()
+            if args.json:
+                detailed = 'y'
+            elif args.mode:
+                detailed = 'n'
+            else:
+                detailed = input("\n🔬 Want detailed JSON analysis? (y/N): ").strip().lower()
             if detailed == 'y':
-                print("\n" + "="*50)
-                print("📊 DETAILED PORTFOLIO DATA:")
-                print("="*50)
-                portfolio_analysis = advisor.analyze_portfolio(address)
-                import json
-                print(json.dumps(portfolio_analysis, indent=2, default=str))
+                print(_section("📊 DETAILED PORTFOLIO DATA:"))
+                # Reuse what the report was built from, analyze only if it wasn't shown
+                if analysis is None or "error" in analysis:
+                    analysis = advisor.analyze_portfolio(address)
+                _print_json(analysis)
                 
                 if choice in ["2", "3"]:
-                    print("\n" + "="*50)
-                    print("🏗️ DETAILED PLATFORMS DATA:")
-                    print("="*50)
-                    platforms_data = platforms_detector.detect_platform_interactions(address)
-                    print(json.dumps(platforms_data, indent=2, default=str))
+                    print(_section("🏗️ DETAILED PLATFORMS DATA:"))
+                    platforms_data = (
+                        platforms_detector.last_detection.get(address)
+                        or platforms_detector.detect_platform_interactions(address)
+                    )
+                    _print_json(platforms_data)
                 
         except KeyboardInterrupt:
             print("\n👋 Analysis complete!")
@@ -128,6 +279,8 @@ def main():
     except Exception as e:
         print(f"❌ An error occurred: {e}")
         print("Please try again or check your internet connection.")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
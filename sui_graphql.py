@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Shared Sui GraphQL helpers
+Raw queries used by both the DeFi advisor and the platforms detector
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Tuple
+
+import httpx
+from gql import Client
+from gql.transport.exceptions import TransportAlreadyConnected
+from gql.transport.httpx import HTTPXTransport
+from graphql import ExecutionResult
+from pysui import PysuiConfiguration, SyncGqlClient
+
+try:
+    # Optional: several times faster than the stdlib decoder on large responses
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Requested page size, sized so a typical wallet fits in a single response.
+# Capped to the server's maxPageSize (see _page_size).
+PAGE_SIZE = 200
+
+# Selection sets are trimmed to the fields the analysis actually reads.
+# Object types come back inside the owned-objects connection itself, so a
+# page of up to PAGE_SIZE objects costs one request and no object is ever
+# fetched individually (no multiGetObjects round-trips needed).
+_BALANCES_QUERY = """
+  balances: address(address: %(owner)s) {
+    balances(first: %(first)d, after: %(after)s) {
+      pageInfo { hasNextPage endCursor }
+      nodes { coinType { repr } totalBalance }
+    }
+  }"""
+_OBJECTS_QUERY = """
+  objects: objects(filter: {owner: %(owner)s}, first: %(first)d, after: %(after)s) {
+    pageInfo { hasNextPage endCursor }
+    nodes { address asMoveObject { contents { type { repr } } } }
+  }"""
+
+# Coin balances and owned objects in a single round-trip. The two top-level
+# fields are aliased so the response can be split back into two results.
+WALLET_QUERY = "query {%s%s\n}\n" % (_BALANCES_QUERY, _OBJECTS_QUERY)
+
+# Current epoch, used to key cached per-address analyses
+EPOCH_QUERY = "query { epoch { epochId } }"
+
+# Cheapest valid query, only used to open a connection
+_PING_QUERY = "query { __typename }"
+
+# Follow-up pages are fetched one connection at a time
+_BALANCES_PAGE_QUERY = "query {%s\n}\n" % _BALANCES_QUERY
+_OBJECTS_PAGE_QUERY = "query {%s\n}\n" % _OBJECTS_QUERY
+
+
+class _SharedPoolTransport(HTTPXTransport):
+    """
+    HTTPXTransport that sends over a shared httpx.Client instead of its own
+    Responses are decoded with orjson when it is installed.
+    """
+    
+    def __init__(self, url: str, http_client: httpx.Client):
+        super().__init__(url=url)
+        self._http_client = http_client
+    
+    def connect(self):
+        if self.client:
+            raise TransportAlreadyConnected("Transport is already connected")
+        self.client = self._http_client
+    
+    def close(self):
+        # The pool belongs to ConcurrentGqlClient and outlives this session
+        self.client = None
+    
+    def _prepare_result(self, response):
+        # Same checks as gql's HTTPXTransport, only the decoder differs
+        self.response_headers = response.headers
+        
+        try:
+            result = _json_loads(response.content)
+        except Exception:
+            self._raise_response_error(response, "Not a JSON answer")
+        
+        if "errors" not in result and "data" not in result:
+            self._raise_response_error(response, 'No "data" or "errors" keys in answer')
+        
+        return ExecutionResult(
+            errors=result.get("errors"),
+            data=result.get("data"),
+            extensions=result.get("extensions")
+        )
+
+
+class ConcurrentGqlClient(SyncGqlClient):
+    """
+    SyncGqlClient that can run queries from several threads at once
+    pysui executes every query on one gql transport, which only allows a single
+    connection at a time, so each thread gets its own session on the loaded schema.
+    All sessions send through one thread-safe httpx.Client, so every thread
+    shares the same HTTP/2 connection pool.
+    """
+    
+    def __init__(self, *, proxies: Optional[dict] = None, **kwargs):
+        # pysui only takes proxies from 0.85.0, so older versions never see the keyword
+        proxy_kwargs = {"proxies": proxies} if proxies is not None else {}
+        super().__init__(**proxy_kwargs, **kwargs)
+        self._local = threading.local()
+        # Same settings pysui uses for the schema load
+        self._http_client = httpx.Client(verify=True, http2=True, timeout=120.0, **proxy_kwargs)
+    
+    def warm_up(self):
+        """Open a connection in the shared pool with a trivial query, ignoring failures"""
+        try:
+            self.execute_query_string(string=_PING_QUERY)
+        except Exception:
+            pass
+    
+    def client(self):
+        """Fetch the calling thread's connected gql session"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            gql_client = Client(
+                schema=self._schema.client.schema,
+                transport=_SharedPoolTransport(self.url(), self._http_client)
+            )
+            session = self._local.session = gql_client.connect_sync()
+        return session
+
+
+def create_client(proxies: Optional[dict] = None) -> ConcurrentGqlClient:
+    """
+    Create a client for the configured Sui GraphQL (mainnet) group
+    One client can be shared by the advisor and the platforms detector.
+    """
+    cfg = PysuiConfiguration(group_name=PysuiConfiguration.SUI_GQL_RPC_GROUP)
+    return ConcurrentGqlClient(pysui_config=cfg, write_schema=False, proxies=proxies)
+
+
+def _page_size(client) -> int:
+    """PAGE_SIZE capped to the server's advertised maxPageSize"""
+    try:
+        return min(PAGE_SIZE, client.rpc_config().serviceConfig.maxPageSize)
+    except AttributeError:
+        return PAGE_SIZE
+
+
+def _run_query(client, query: str, owner: str, first: int, cursor: Optional[str] = None) -> Dict:
+    """Execute a wallet query template and return its data, raising on failure"""
+    # json.dumps yields valid, escaped GraphQL string literals
+    result = client.execute_query_string(string=query % {
+        "owner": json.dumps(owner),
+        "first": first,
+        "after": json.dumps(cursor) if cursor else "null"
+    })
+    if not result.is_ok():
+        raise ValueError(result.result_string)
+    return result.result_data or {}
+
+
+def _balances_connection(data: Dict) -> Dict:
+    return (data.get("balances") or {}).get("balances") or {}
+
+
+def _objects_connection(data: Dict) -> Dict:
+    return data.get("objects") or {}
+
+
+def _iter_nodes(client, owner: str, first: int, connection: Dict,
+                page_query: str, get_connection: Callable[[Dict], Dict]) -> Iterator[Dict]:
+    """Yield the nodes of a connection, fetching later pages only as they are reached"""
+    while True:
+        yield from connection.get("nodes") or []
+        page_info = connection.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            return
+        data = _run_query(client, page_query, owner, first, page_info.get("endCursor"))
+        connection = get_connection(data)
+
+
+class CoinBalance(NamedTuple):
+    """Total balance of one coin type owned by an address"""
+    coin_type: str
+    # Decoded once from the BigInt string, u64 values fit Python ints
+    total_balance: int
+
+
+class OwnedObject(NamedTuple):
+    """Id and Move type of an object owned by an address"""
+    object_id: str
+    object_type: str
+
+
+def _parse_balance(total_balance) -> int:
+    """Parse a raw totalBalance, treating missing or malformed values as 0"""
+    try:
+        return int(total_balance)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _iter_balances(client, owner: str, first: int, connection: Dict) -> Iterator[CoinBalance]:
+    """Yield coin balances across all pages, skipping nodes without a coin type"""
+    for node in _iter_nodes(client, owner, first, connection, _BALANCES_PAGE_QUERY, _balances_connection):
+        coin_type = (node.get("coinType") or {}).get("repr")
+        if coin_type:
+            yield CoinBalance(coin_type, _parse_balance(node.get("totalBalance")))
+
+
+def _iter_objects(client, owner: str, first: int, connection: Dict) -> Iterator[OwnedObject]:
+    """Yield owned objects across all pages"""
+    for node in _iter_nodes(client, owner, first, connection, _OBJECTS_PAGE_QUERY, _objects_connection):
+        contents = (node.get("asMoveObject") or {}).get("contents") or {}
+        yield OwnedObject(
+            node.get("address"),
+            # pysui reports non Move objects (packages) as "Package"
+            (contents.get("type") or {}).get("repr") or "Package"
+        )
+
+
+class _PagedData:
+    """
+    Re-iterable view over a paginated connection
+    Only the first page is held; later pages are streamed and dropped while
+    iterating, so memory stays bounded by one page. Iterating again refetches them.
+    """
+    
+    def __init__(self, make_iter: Callable[[], Iterator], first_page: Dict):
+        self._make_iter = make_iter
+        self._first_page = first_page
+    
+    def __bool__(self) -> bool:
+        return bool(self._first_page.get("nodes"))
+    
+    def __iter__(self) -> Iterator:
+        return self._make_iter()
+
+
+def _as_result(data: _PagedData) -> SimpleNamespace:
+    """Wrap data so it exposes the pysui `result_data.data` path"""
+    return SimpleNamespace(result_data=SimpleNamespace(data=data))
+
+
+def fetch_wallet_data(client, address: str) -> Tuple[SimpleNamespace, SimpleNamespace]:
+    """
+    Fetch coin balances and owned objects for an address
+    The first page of both comes back in one query, further pages are fetched
+    lazily while iterating. Returns (balances_result, objects_result) shaped like
+    the pysui query node results, except `data` is an iterable of CoinBalance /
+    OwnedObject records rather than a list.
+    """
+    first = _page_size(client)
+    data = _run_query(client, WALLET_QUERY, address, first)
+    
+    balances = _balances_connection(data)
+    objects = _objects_connection(data)
+    return (
+        _as_result(_PagedData(lambda: _iter_balances(client, address, first, balances), balances)),
+        _as_result(_PagedData(lambda: _iter_objects(client, address, first, objects), objects))
+    )
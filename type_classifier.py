@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Keyword classification of Sui object types
+Shared by the advisor and the platforms detector to label owned objects
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Optional, Sequence, Tuple
+
+
+def make_keyword_classifier(table: Sequence[Tuple[str, Optional[str]]],
+                            default: Optional[str]) -> Callable[[str], Optional[str]]:
+    """
+    Build a classifier from (keyword, label) pairs in priority order
+    It takes an already lowercased object type and returns the label of the
+    highest priority keyword it contains, or default when none match.
+    """
+    # One pass finds every keyword; the lookahead keeps overlapping hits too
+    keywords_re = re.compile("(?=(%s))" % "|".join(re.escape(k) for k, _ in table))
+    rank = {}
+    for i, (keyword, _) in enumerate(table):
+        rank.setdefault(keyword, i)
+    
+    # Cached because wallets typically hold many objects of the same few types
+    @lru_cache(maxsize=4096)
+    def classify(object_type_lower: str) -> Optional[str]:
+        hits = keywords_re.findall(object_type_lower)
+        if not hits:
+            return default
+        
+        # Highest priority keyword wins
+        return table[min(rank[hit] for hit in hits)][1]
+    
+    return classify